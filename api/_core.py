@@ -0,0 +1,164 @@
+# api/_core.py
+# Card models and the deck builder shared by the api/ entry points
+import functools, hashlib, io, re
+from typing import List, Literal, Optional, Tuple
+import genanki
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
+
+_KEBAB_RE = re.compile(r"[^a-z0-9]+")
+# ASCII fast path for kebab: lowercase letters, keep digits, everything else -> "-"
+_KEBAB_TT = bytes(
+    b if 97 <= b <= 122 or 48 <= b <= 57 else b + 32 if 65 <= b <= 90 else 45
+    for b in range(256)
+)
+
+NoteType = Literal["Basic", "Basic (and reverse)", "Cloze"]
+
+class Card(BaseModel):
+    note_type: NoteType
+    front: Optional[str] = None
+    back: Optional[str] = None
+    text: Optional[str] = None
+    tags: Optional[List[str]] = None
+
+    @field_validator("front")
+    @classmethod
+    def v_front(cls, v, info: ValidationInfo):
+        if info.data.get("note_type") in ["Basic","Basic (and reverse)"] and not v:
+            raise ValueError("front required for Basic/Reverse")
+        return v
+
+    @field_validator("back")
+    @classmethod
+    def v_back(cls, v, info: ValidationInfo):
+        if info.data.get("note_type") in ["Basic","Basic (and reverse)"] and not v:
+            raise ValueError("back required for Basic/Reverse")
+        return v
+
+    @field_validator("text")
+    @classmethod
+    def v_text(cls, v, info: ValidationInfo):
+        if info.data.get("note_type") == "Cloze" and not v:
+            raise ValueError("text required for Cloze")
+        if v and count_cloze(v, stop=3) > 2:
+            raise ValueError("Cloze has more than 2 deletions; max is 2")
+        return v
+
+def count_cloze(s: str, stop: int) -> int:
+    # Counts "{{c<digits>::" markers, giving up once `stop` are seen. str.find
+    # skips to each "{{c" candidate; the rest of the marker is confirmed in place.
+    n, i, end = 0, s.find("{{c"), len(s)
+    while i >= 0 and n < stop:
+        j = i + 3
+        while j < end and s[j].isdecimal():
+            j += 1
+        if j > i + 3 and s.startswith("::", j):
+            n += 1
+            i = s.find("{{c", j + 2)
+        else:
+            i = s.find("{{c", i + 3)
+    return n
+
+class BuildRequest(BaseModel):
+    deck_name: Optional[str] = Field(default="Learning AI")
+    cards: List[Card]
+
+# Tag caches are bounded by entry count, so only short, client-supplied inputs
+# are memoized; anything longer is recomputed rather than pinned in memory
+MEMO_MAX_CHARS = 256
+
+def _kebab(s: str) -> str:
+    if s.isascii():
+        # split/join drops empty pieces, collapsing runs of "-" and stripping the ends
+        t = s.encode("ascii").translate(_KEBAB_TT)
+        return b"-".join(filter(None, t.split(b"-"))).decode("ascii")
+    s = s.lower()
+    s = _KEBAB_RE.sub("-", s).strip("-")
+    return s
+
+_kebab_cached = functools.lru_cache(maxsize=4096)(_kebab)
+
+def kebab(s: str) -> str:
+    return _kebab_cached(s) if len(s) <= MEMO_MAX_CHARS else _kebab(s)
+
+def _normalize_tags_tuple(tags: Tuple[str, ...]) -> Tuple[str, ...]:
+    out = []
+    for t in tags:
+        if ":" in t:
+            k, v = t.split(":", 1)
+            out.append(f"{k}:{kebab(v)}")
+        else:
+            out.append(kebab(t))
+    return tuple(out)
+
+_normalize_tags_cached = functools.lru_cache(maxsize=4096)(_normalize_tags_tuple)
+
+# Cards in a batch usually share one tag list, so cache whole lists as tuples
+def normalize_tags_tuple(tags: Tuple[str, ...]) -> Tuple[str, ...]:
+    # Each tag counts one extra so lists of empty strings are bounded too
+    if len(tags) + sum(map(len, tags)) <= MEMO_MAX_CHARS:
+        return _normalize_tags_cached(tags)
+    return _normalize_tags_tuple(tags)
+
+def normalize_tags(tags: Optional[List[str]]) -> List[str]:
+    return list(normalize_tags_tuple(tuple(tags or ())))
+
+BASIC_MODEL_ID = 1607392319
+REVERSE_MODEL_ID = BASIC_MODEL_ID + 1
+CLOZE_MODEL_ID = 998877665
+
+# Note models are constants; build them once at import rather than per request
+_BASIC_MODEL = genanki.Model(
+    BASIC_MODEL_ID, "Basic",
+    fields=[{"name":"Front"},{"name":"Back"}],
+    templates=[{"name":"Card 1","qfmt":"{{Front}}","afmt":"{{FrontSide}}<hr id=\"answer\">{{Back}}"}],
+    css=".card { font-family: arial; font-size: 16px; text-align: left; }",
+)
+_REVERSE_MODEL = genanki.Model(
+    REVERSE_MODEL_ID, "Basic (and reverse)",
+    fields=[{"name":"Front"},{"name":"Back"}],
+    templates=[
+        {"name":"Forward","qfmt":"{{Front}}","afmt":"{{FrontSide}}<hr id=\"answer\">{{Back}}"},
+        {"name":"Reverse","qfmt":"{{Back}}","afmt":"{{Back}}<hr id=\"answer\">{{Front}}"},
+    ],
+    css=".card { font-family: arial; font-size: 16px; text-align: left; }",
+)
+_CLOZE_MODEL = genanki.Model(
+    CLOZE_MODEL_ID, "Cloze",
+    fields=[{"name":"Text"}],
+    templates=[{"name":"Cloze","qfmt":"{{cloze:Text}}","afmt":"{{cloze:Text}}"}],
+    css=".card { font-family: arial; font-size: 16px; text-align: left; }",
+    model_type=genanki.Model.CLOZE,
+)
+
+def _deck_id(deck_name: str) -> int:
+    return int(hashlib.sha256(deck_name.encode("utf-8")).hexdigest()[:12], 16)
+
+_deck_id_cached = functools.lru_cache(maxsize=256)(_deck_id)
+
+def deck_id_for(deck_name: str) -> int:
+    return _deck_id_cached(deck_name) if len(deck_name) <= MEMO_MAX_CHARS else _deck_id(deck_name)
+
+def build_apkg_buffer(deck_name: str, cards: List[Card]) -> io.BytesIO:
+    deck_id = deck_id_for(deck_name)
+
+    notes = []
+    notes_append = notes.append
+    for c in cards:
+        tags = normalize_tags(c.tags)
+        if c.note_type == "Basic":
+            note = genanki.Note(model=_BASIC_MODEL, fields=[c.front, c.back], tags=tags)
+        elif c.note_type == "Basic (and reverse)":
+            note = genanki.Note(model=_REVERSE_MODEL, fields=[c.front, c.back], tags=tags)
+        else:
+            note = genanki.Note(model=_CLOZE_MODEL, fields=[c.text], tags=tags)
+        notes_append(note)
+
+    deck = genanki.Deck(deck_id, deck_name)
+    # Deck.add_note is a plain list append; hand over the whole list instead
+    deck.notes = notes
+
+    # write_to_file hands its target to zipfile.ZipFile, which accepts a buffer
+    buf = io.BytesIO()
+    genanki.Package(deck).write_to_file(buf)
+    return buf
\ No newline at end of file
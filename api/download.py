@@ -1,38 +1,92 @@
 # api/download.py
-import base64, json, re
-from typing import List, Literal, Optional
-from fastapi import FastAPI, Response, HTTPException
-from pydantic import BaseModel
-from .build_apkg import build_apkg_bytes  # reuse the builder
+import hashlib, re, sys, threading
+from collections import OrderedDict
+from typing import AsyncIterator, Optional, Tuple
+try:
+    from pybase64 import urlsafe_b64decode  # SIMD-accelerated when available
+except ImportError:
+    from base64 import urlsafe_b64decode
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from ._core import BuildRequest, build_apkg_buffer  # reuse the model and builder
 
-app = FastAPI()
+router = APIRouter()
+
+_SAFE_RE = re.compile(r"[^a-zA-Z0-9._-]+")
+
+APKG_CHUNK = 64 * 1024
 
-NoteType = Literal["Basic", "Basic (and reverse)", "Cloze"]
+# Async so StreamingResponse iterates it on the event loop; a sync generator
+# would cost a threadpool hop per chunk for what is only an in-memory slice
+async def iter_chunks(content: memoryview) -> AsyncIterator[bytes]:
+    for i in range(0, len(content), APKG_CHUNK):
+        yield bytes(content[i:i + APKG_CHUNK])
 
-class Card(BaseModel):
-    note_type: NoteType
-    front: Optional[str] = None
-    back: Optional[str] = None
-    text: Optional[str] = None
-    tags: Optional[List[str]] = None
+def payload_key(payload: str) -> bytes:
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
 
-class BuildPayload(BaseModel):
-    deck_name: Optional[str] = "Learning AI"
-    cards: List[Card]
+# Built packages keyed by a hash of the download payload, so repeat downloads of
+# the same link skip the rebuild. Evicted least-recently-used past the byte budget,
+# which counts each BytesIO's full allocation since the cached view keeps it alive.
+APKG_CACHE_BYTES = 64 * 1024 * 1024
+_APKG_CACHE: "OrderedDict[bytes, Tuple[str, memoryview, int]]" = OrderedDict()
+_APKG_CACHE_SIZE = 0
+_APKG_CACHE_LOCK = threading.Lock()
 
-@app.get("/")
-@app.get("/api/download")
+def cache_get(key: bytes) -> Optional[Tuple[str, memoryview]]:
+    with _APKG_CACHE_LOCK:
+        entry = _APKG_CACHE.get(key)
+        if entry is None:
+            return None
+        _APKG_CACHE.move_to_end(key)
+        return entry[0], entry[1]
+
+def cache_put(key: bytes, filename: str, content: memoryview, size: int) -> None:
+    global _APKG_CACHE_SIZE
+    if size > APKG_CACHE_BYTES:
+        return
+    with _APKG_CACHE_LOCK:
+        old = _APKG_CACHE.pop(key, None)
+        if old is not None:
+            _APKG_CACHE_SIZE -= old[2]
+        _APKG_CACHE[key] = (filename, content, size)
+        _APKG_CACHE_SIZE += size
+        while _APKG_CACHE_SIZE > APKG_CACHE_BYTES:
+            _, (_, _, evicted) = _APKG_CACHE.popitem(last=False)
+            _APKG_CACHE_SIZE -= evicted
+
+def apkg_response(filename: str, content: memoryview) -> StreamingResponse:
+    return StreamingResponse(
+        iter_chunks(content),
+        media_type="application/octet-stream",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(len(content)),
+        }
+    )
+
+# Accept both "/api/download" and "/"
+@router.get("/")
+@router.get("/api/download")
 def download(payload: str):
+    key = payload_key(payload)
+    cached = cache_get(key)
+    if cached is not None:
+        return apkg_response(*cached)
+
     try:
-        data = json.loads(base64.urlsafe_b64decode(payload.encode("ascii")))
-        bp = BuildPayload(**data)
+        # model_validate_json parses and validates in one pass inside pydantic-core
+        bp = BuildRequest.model_validate_json(urlsafe_b64decode(payload))
     except Exception:
         raise HTTPException(status_code=400, detail="Bad payload")
+    deck_name = bp.deck_name or "Learning AI"
 
-    content = build_apkg_bytes(bp.deck_name or "Learning AI", bp.cards)
-    safe = re.sub(r"[^a-zA-Z0-9._-]+", "_", f"{bp.deck_name}.apkg") or "deck.apkg"
-    return Response(
-        content=content,
-        media_type="application/octet-stream",
-        headers={"Content-Disposition": f'attachment; filename="{safe}"'}
-    )
\ No newline at end of file
+    buf = build_apkg_buffer(deck_name, bp.cards)
+    # A view of the buffer rather than getvalue(), which would copy the package
+    content = buf.getbuffer()
+    safe = _SAFE_RE.sub("_", f"{deck_name}.apkg") or "deck.apkg"
+    cache_put(key, safe, content, sys.getsizeof(buf))
+    return apkg_response(safe, content)
+
+app = FastAPI()
+app.include_router(router)
\ No newline at end of file
@@ -1,9 +1,14 @@
-from fastapi import FastAPI
-app = FastAPI()
+# api/index.py
+from fastapi import APIRouter, FastAPI
+
+router = APIRouter()
 
 # Accept both prefixed and non-prefixed paths
-@app.get("/")
-@app.get("/index")
-@app.get("/api/index")
+@router.get("/")
+@router.get("/index")
+@router.get("/api/index")
 def health():
-    return {"ok": True, "service": "anki-packager"}
\ No newline at end of file
+    return {"ok": True, "service": "anki-packager"}
+
+app = FastAPI()
+app.include_router(router)
\ No newline at end of file
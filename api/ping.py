@@ -1,9 +1,16 @@
 # api/ping.py
 from http.server import BaseHTTPRequestHandler
 
+_BODY = b'{"ok": true, "service": "anki-packager"}'
+# The reply never changes, so send prebuilt status line, headers and body in one write
+_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-type: application/json\r\n"
+    b"Content-Length: " + str(len(_BODY)).encode("ascii") + b"\r\n"
+    b"Connection: close\r\n"
+    b"\r\n" + _BODY
+)
+
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        self.send_response(200)
-        self.send_header("Content-type","application/json")
-        self.end_headers()
-        self.wfile.write(b'{"ok": true, "service": "anki-packager"}')
\ No newline at end of file
+        self.wfile.write(_RESPONSE)
\ No newline at end of file
@@ -1,6 +1,12 @@
 # main.py (optional) for local testing
 import uvicorn
-from api.index import app
+from fastapi import FastAPI
+from api import build_apkg, download, index
+
+# One app with every entry point's routes; "/" falls through to the first match
+app = FastAPI()
+for entry in (index, build_apkg, download):
+    app.include_router(entry.router)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)